@@ -1,25 +1,109 @@
 """Flask REST API for DOCX to PDF conversion with variable replacement"""
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-from werkzeug.exceptions import BadRequest
-from io import BytesIO
-import traceback
-
+from werkzeug.exceptions import BadRequest, HTTPException, RequestEntityTooLarge
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+import base64
+import json
+import multiprocessing
+import orjson
+import os
+import threading
+
+# PDF conversion and S3 helpers are imported inside the endpoints that need them,
+# so a Lambda cold start serving only extraction/replacement never loads boto3
 from services.docx_service import (
     extract_variables,
     replace_variables,
-    extract_variables_and_convert_pdf,
-    extract_convert_upload_get_url,
-    replace_from_s3_convert_and_upload,
     normalize_variables_input,
 )
-from services.pdf_service import convert_docx_to_pdf
 from utils.validators import validate_docx_file, validate_variables_mapping
 
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson for faster jsonify/get_json."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs) -> Response:
+        # Hand orjson's bytes straight to the response instead of round-tripping via str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+# Reject oversized bodies before they are parsed (10MB file plus multipart overhead).
+# Werkzeug spools larger uploads to a temporary file rather than keeping them in RAM.
+app.config['MAX_CONTENT_LENGTH'] = 11 * 1024 * 1024
 CORS(app)
 
+# Worker processes for CPU-bound DOCX parsing and PDF conversion. Created lazily so
+# each Gunicorn worker builds its own pool after forking; 'spawn' keeps children
+# from inheriting soffice processes or open sockets.
+# Capped because every web worker has its own pool and each pool worker may run
+# its own LibreOffice daemon; override with CPU_POOL_WORKERS.
+_CPU_POOL_WORKERS = int(os.environ.get('CPU_POOL_WORKERS') or min(4, os.cpu_count() or 1))
+_cpu_pool: Optional[ProcessPoolExecutor] = None
+_cpu_pool_lock = threading.Lock()
+
+
+def _get_cpu_pool() -> Optional[ProcessPoolExecutor]:
+    """Return the process pool, or None on Lambda where the platform handles concurrency."""
+    global _cpu_pool
+    if os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
+        return None
+    with _cpu_pool_lock:
+        if _cpu_pool is None:
+            _cpu_pool = ProcessPoolExecutor(
+                max_workers=_CPU_POOL_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+    return _cpu_pool
+
+
+def _run_cpu_bound(fn, docx_content, **kwargs):
+    """Run fn(docx_content, **kwargs) in the process pool, or inline when there is none."""
+    pool = _get_cpu_pool()
+    if pool is None:
+        return fn(docx_content, **kwargs)
+    # Upload streams cannot be pickled, so ship their bytes to the worker
+    if not isinstance(docx_content, (bytes, bytearray)):
+        docx_content.seek(0)
+        docx_content = docx_content.read()
+    try:
+        return pool.submit(fn, docx_content, **kwargs).result()
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed) and the pool is unusable; replace it and retry once
+        _reset_cpu_pool(pool)
+        return _get_cpu_pool().submit(fn, docx_content, **kwargs).result()
+
+
+def _reset_cpu_pool(broken: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next _get_cpu_pool() call builds a fresh one."""
+    global _cpu_pool
+    with _cpu_pool_lock:
+        # Another request may already have replaced it
+        if _cpu_pool is broken:
+            _cpu_pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _binary_response(data: bytes, mimetype: str, filename: str) -> Response:
+    """Return bytes as a file download without wrapping them in another buffer."""
+    response = Response(data, mimetype=mimetype)
+    response.headers['Content-Length'] = str(len(data))
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 
 @app.route('/health', methods=['GET'])
 def health_check():
@@ -35,32 +119,23 @@ def extract_variables_endpoint():
     Request: multipart/form-data with 'file' field (DOCX file)
     Response: JSON with list of variable names
     """
-    try:
-        # Validate file
-        if 'file' not in request.files:
-            raise BadRequest("No file provided in request")
-        
-        file = request.files['file']
-        validate_docx_file(file)
-        
-        # Read file content
-        docx_content = file.read()
-        
-        # Extract variables
-        variables = extract_variables(docx_content)
-        
-        return jsonify({
-            'variables': variables,
-            'count': len(variables)
-        }), 200
+    # Validate file
+    if 'file' not in request.files:
+        raise BadRequest("No file provided in request")
+    
+    file = request.files['file']
+    validate_docx_file(file, request.content_length)
+    
+    # Hand the spooled upload stream on instead of copying it into memory
+    docx_content = file.stream
     
-    except BadRequest as e:
-        return jsonify({'error': str(e)}), 400
-    except Exception as e:
-        return jsonify({
-            'error': 'Failed to extract variables',
-            'message': str(e)
-        }), 500
+    # Extract variables
+    variables = extract_variables(docx_content)
+    
+    return jsonify({
+        'variables': variables,
+        'count': len(variables)
+    }), 200
 
 
 @app.route('/api/replace-variables', methods=['POST'])
@@ -73,48 +148,37 @@ def replace_variables_endpoint():
         - 'variables': JSON string mapping variable names to values
     Response: DOCX file with replaced variables
     """
+    # Validate file
+    if 'file' not in request.files:
+        raise BadRequest("No file provided in request")
+    
+    file = request.files['file']
+    validate_docx_file(file, request.content_length)
+    
+    # Get variables mapping
+    variables_json = request.form.get('variables')
+    if not variables_json:
+        raise BadRequest("Variables mapping is required")
+    
     try:
-        # Validate file
-        if 'file' not in request.files:
-            raise BadRequest("No file provided in request")
-        
-        file = request.files['file']
-        validate_docx_file(file)
-        
-        # Get variables mapping
-        variables_json = request.form.get('variables')
-        if not variables_json:
-            raise BadRequest("Variables mapping is required")
-        
-        import json
-        try:
-            variables = json.loads(variables_json)
-        except json.JSONDecodeError:
-            raise BadRequest("Invalid JSON in variables field")
-        
-        validate_variables_mapping(variables)
-        
-        # Read file content
-        docx_content = file.read()
-        
-        # Replace variables
-        modified_docx = replace_variables(docx_content, variables)
-        
-        # Return as binary
-        return send_file(
-            BytesIO(modified_docx),
-            mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            as_attachment=True,
-            download_name='modified.docx'
-        )
+        variables = json.loads(variables_json)
+    except json.JSONDecodeError:
+        raise BadRequest("Invalid JSON in variables field")
+    
+    validate_variables_mapping(variables)
+    
+    # Hand the spooled upload stream on instead of copying it into memory
+    docx_content = file.stream
+    
+    # Replace variables
+    modified_docx = replace_variables(docx_content, variables)
     
-    except BadRequest as e:
-        return jsonify({'error': str(e)}), 400
-    except Exception as e:
-        return jsonify({
-            'error': 'Failed to replace variables',
-            'message': str(e)
-        }), 500
+    # Return as binary
+    return _binary_response(
+        modified_docx,
+        'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+        'modified.docx'
+    )
 
 
 @app.route('/api/convert-to-pdf', methods=['POST'])
@@ -125,35 +189,22 @@ def convert_to_pdf_endpoint():
     Request: multipart/form-data with 'file' field (DOCX file)
     Response: PDF file
     """
-    try:
-        # Validate file
-        if 'file' not in request.files:
-            raise BadRequest("No file provided in request")
-        
-        file = request.files['file']
-        validate_docx_file(file)
-        
-        # Read file content
-        docx_content = file.read()
-        
-        # Convert to PDF
-        pdf_content = convert_docx_to_pdf(docx_content)
-        
-        # Return as binary
-        return send_file(
-            BytesIO(pdf_content),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name='converted.pdf'
-        )
+    # Validate file
+    if 'file' not in request.files:
+        raise BadRequest("No file provided in request")
+    
+    file = request.files['file']
+    validate_docx_file(file, request.content_length)
+    
+    # Hand the spooled upload stream on instead of copying it into memory
+    docx_content = file.stream
     
-    except BadRequest as e:
-        return jsonify({'error': str(e)}), 400
-    except Exception as e:
-        return jsonify({
-            'error': 'Failed to convert to PDF',
-            'message': str(e)
-        }), 500
+    # Convert to PDF
+    from services.pdf_service import convert_docx_to_pdf
+    pdf_content = convert_docx_to_pdf(docx_content)
+    
+    # Return as binary
+    return _binary_response(pdf_content, 'application/pdf', 'converted.pdf')
 
 
 @app.route('/api/process-document', methods=['POST'])
@@ -166,51 +217,40 @@ def process_document_endpoint():
         - 'variables': JSON string mapping variable names to values
     Response: PDF file with replaced variables
     """
+    # Validate file
+    if 'file' not in request.files:
+        raise BadRequest("No file provided in request")
+    
+    file = request.files['file']
+    validate_docx_file(file, request.content_length)
+    
+    # Get variables mapping
+    variables_json = request.form.get('variables')
+    if not variables_json:
+        raise BadRequest("Variables mapping is required")
+    
     try:
-        # Validate file
-        if 'file' not in request.files:
-            raise BadRequest("No file provided in request")
-        
-        file = request.files['file']
-        validate_docx_file(file)
-        
-        # Get variables mapping
-        variables_json = request.form.get('variables')
-        if not variables_json:
-            raise BadRequest("Variables mapping is required")
-        
-        import json
-        try:
-            variables = json.loads(variables_json)
-        except json.JSONDecodeError:
-            raise BadRequest("Invalid JSON in variables field")
-        
-        validate_variables_mapping(variables)
-        
-        # Read file content
-        docx_content = file.read()
-        
-        # Replace variables
-        modified_docx = replace_variables(docx_content, variables)
-        
-        # Convert to PDF
-        pdf_content = convert_docx_to_pdf(modified_docx)
-        
-        # Return as binary
-        return send_file(
-            BytesIO(pdf_content),
-            mimetype='application/pdf',
-            as_attachment=True,
-            download_name='processed.pdf'
+        variables = json.loads(variables_json)
+    except json.JSONDecodeError:
+        raise BadRequest("Invalid JSON in variables field")
+    
+    validate_variables_mapping(variables)
+    
+    # Hand the spooled upload stream on instead of copying it into memory
+    docx_content = file.stream
+    
+    # Replace variables and convert to PDF; an empty mapping converts as-is
+    from services.docx_service import replace_variables_and_convert_pdf
+    from services.pdf_service import convert_docx_to_pdf
+    if variables:
+        pdf_content = _run_cpu_bound(
+            replace_variables_and_convert_pdf, docx_content, variables=variables
         )
+    else:
+        pdf_content = convert_docx_to_pdf(docx_content)
     
-    except BadRequest as e:
-        return jsonify({'error': str(e)}), 400
-    except Exception as e:
-        return jsonify({
-            'error': 'Failed to process document',
-            'message': str(e)
-        }), 500
+    # Return as binary
+    return _binary_response(pdf_content, 'application/pdf', 'processed.pdf')
 
 
 @app.route('/api/extract-and-convert', methods=['POST'])
@@ -227,49 +267,37 @@ def extract_and_convert_endpoint():
       "pdfBase64": "JVBERi0xLjQK..."
     }
     """
-    try:
-        # Validate file
-        if 'file' not in request.files:
-            raise BadRequest("No file provided in request")
-
-        file = request.files['file']
-        validate_docx_file(file)
-
-        # Parse optional variables JSON
-        variables = None
-        variables_json = request.form.get('variables')
-        if variables_json:
-            import json
-            try:
-                variables = json.loads(variables_json)
-            except json.JSONDecodeError:
-                raise BadRequest("Invalid JSON in variables field")
-            validate_variables_mapping(variables)
+    # Validate file
+    if 'file' not in request.files:
+        raise BadRequest("No file provided in request")
 
-        # Read file content
-        docx_content = file.read()
+    file = request.files['file']
+    validate_docx_file(file, request.content_length)
 
-        # Execute combined operation
-        variables_list, pdf_bytes = extract_variables_and_convert_pdf(
-            docx_content, variables
-        )
+    # Parse optional variables JSON
+    variables = None
+    variables_json = request.form.get('variables')
+    if variables_json:
+        try:
+            variables = json.loads(variables_json)
+        except json.JSONDecodeError:
+            raise BadRequest("Invalid JSON in variables field")
+        validate_variables_mapping(variables)
 
-        # Encode PDF to base64
-        import base64
-        pdf_base64 = base64.b64encode(pdf_bytes).decode('utf-8')
+    # Hand the spooled upload stream on instead of copying it into memory
+    docx_content = file.stream
 
-        return jsonify({
-            'variables': variables_list,
-            'pdfBase64': pdf_base64,
-        }), 200
+    # Execute combined operation
+    from services.docx_service import extract_variables_and_convert_pdf
+    variables_list, pdf_bytes = extract_variables_and_convert_pdf(
+        docx_content, variables
+    )
 
-    except BadRequest as e:
-        return jsonify({'error': str(e)}), 400
-    except Exception as e:
-        return jsonify({
-            'error': 'Failed to extract and convert',
-            'message': str(e)
-        }), 500
+    # Base64 output is pure ASCII, so decode without UTF-8 validation
+    return jsonify({
+        'variables': variables_list,
+        'pdfBase64': base64.b64encode(pdf_bytes).decode('ascii'),
+    }), 200
 
 
 @app.route('/api/extract-convert-upload', methods=['POST'])
@@ -290,55 +318,47 @@ def extract_convert_upload_endpoint():
       "presignedUrl": "https://..."
     }
     """
-    try:
-        # Validate file
-        if 'file' not in request.files:
-            raise BadRequest("No file provided in request")
-
-        file = request.files['file']
-        validate_docx_file(file)
+    # Validate file
+    if 'file' not in request.files:
+        raise BadRequest("No file provided in request")
 
-        # Optional variables
-        variables = None
-        variables_json = request.form.get('variables')
-        if variables_json:
-            import json
-            try:
-                variables = json.loads(variables_json)
-            except json.JSONDecodeError:
-                raise BadRequest("Invalid JSON in variables field")
-            validate_variables_mapping(variables)
+    file = request.files['file']
+    validate_docx_file(file, request.content_length)
 
-        # Optional S3 inputs
-        s3_prefix = request.form.get('s3Prefix')
-        bucket_override = request.form.get('bucket') or 'assinaai-temp'
-        ttl_seconds_raw = request.form.get('ttlSeconds')
+    # Optional variables
+    variables = None
+    variables_json = request.form.get('variables')
+    if variables_json:
         try:
-            ttl_seconds = int(ttl_seconds_raw) if ttl_seconds_raw else 86400
-        except ValueError:
-            raise BadRequest("ttlSeconds must be an integer")
-
-        # Read file content
-        docx_content = file.read()
-
-        # Execute combined operation with upload
-        result = extract_convert_upload_get_url(
-            docx_content=docx_content,
-            variables=variables,
-            bucket_name=bucket_override,
-            s3_prefix=s3_prefix,
-            presign_ttl_seconds=ttl_seconds,
-        )
-
-        return jsonify(result), 200
+            variables = json.loads(variables_json)
+        except json.JSONDecodeError:
+            raise BadRequest("Invalid JSON in variables field")
+        validate_variables_mapping(variables)
 
-    except BadRequest as e:
-        return jsonify({'error': str(e)}), 400
-    except Exception as e:
-        return jsonify({
-            'error': 'Failed to extract, convert and upload',
-            'message': str(e)
-        }), 500
+    # Optional S3 inputs
+    s3_prefix = request.form.get('s3Prefix')
+    bucket_override = request.form.get('bucket') or 'assinaai-temp'
+    ttl_seconds_raw = request.form.get('ttlSeconds')
+    try:
+        ttl_seconds = int(ttl_seconds_raw) if ttl_seconds_raw else 86400
+    except ValueError:
+        raise BadRequest("ttlSeconds must be an integer")
+
+    # Hand the spooled upload stream on instead of copying it into memory
+    docx_content = file.stream
+
+    # Execute combined operation with upload
+    from services.docx_service import extract_convert_upload_get_url
+    result = _run_cpu_bound(
+        extract_convert_upload_get_url,
+        docx_content,
+        variables=variables,
+        bucket_name=bucket_override,
+        s3_prefix=s3_prefix,
+        presign_ttl_seconds=ttl_seconds,
+    )
+
+    return jsonify(result), 200
 
 @app.errorhandler(404)
 def not_found(error):
@@ -353,6 +373,41 @@ def internal_error(error):
     }), 500
 
 
+# Error reported for unexpected failures, per endpoint
+_FAILURE_MESSAGES = {
+    'extract_variables_endpoint': 'Failed to extract variables',
+    'replace_variables_endpoint': 'Failed to replace variables',
+    'convert_to_pdf_endpoint': 'Failed to convert to PDF',
+    'process_document_endpoint': 'Failed to process document',
+    'extract_and_convert_endpoint': 'Failed to extract and convert',
+    'extract_convert_upload_endpoint': 'Failed to extract, convert and upload',
+    'replace_variables_from_s3_endpoint': 'Failed to replace from S3 and convert',
+}
+
+
+@app.errorhandler(BadRequest)
+def bad_request(error):
+    return jsonify({'error': str(error)}), 400
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(error):
+    # Same response the validator gave oversized uploads before MAX_CONTENT_LENGTH
+    too_large = BadRequest("File size exceeds maximum allowed size of 10MB")
+    return jsonify({'error': str(too_large)}), 400
+
+
+@app.errorhandler(Exception)
+def unhandled_exception(error):
+    # Other HTTP errors (404, 405, ...) keep their normal responses
+    if isinstance(error, HTTPException):
+        return error
+    return jsonify({
+        'error': _FAILURE_MESSAGES.get(request.endpoint, 'Internal server error'),
+        'message': str(error)
+    }), 500
+
+
 @app.route('/api/replace-variables-from-s3', methods=['POST'])
 def replace_variables_from_s3_endpoint():
     """
@@ -373,116 +428,107 @@ def replace_variables_from_s3_endpoint():
       "pdfUrl": "https://..."
     }
     """
-    try:
-        import json
-
-        # Support application/json and multipart/form-data
-        if request.is_json:
-            data = request.get_json(silent=True)
-            if not isinstance(data, dict):
-                raise BadRequest("JSON body must be an object")
-
-            source_bucket = data.get('sourceBucket')
-            source_key = data.get('sourceKey')
-            target_bucket = data.get('targetBucket')
-            target_prefix = data.get('targetPrefix')
-            ttl_seconds_raw = data.get('ttlSeconds')
-
-            if not source_bucket:
-                raise BadRequest("sourceBucket is required")
-            if not source_key:
-                raise BadRequest("sourceKey is required")
-            if not target_bucket:
-                raise BadRequest("targetBucket is required")
-
-            variables_raw = data.get('variables')
-            if variables_raw is None:
-                raise BadRequest("variables is required")
-
-            # Handle double-encoded strings (e.g., objectMapper.writeValueAsString applied twice)
-            if isinstance(variables_raw, str):
+    from services.docx_service import replace_from_s3_convert_and_upload
+
+    # Support application/json and multipart/form-data
+    if request.is_json:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            raise BadRequest("JSON body must be an object")
+
+        source_bucket = data.get('sourceBucket')
+        source_key = data.get('sourceKey')
+        target_bucket = data.get('targetBucket')
+        target_prefix = data.get('targetPrefix')
+        ttl_seconds_raw = data.get('ttlSeconds')
+
+        if not source_bucket:
+            raise BadRequest("sourceBucket is required")
+        if not source_key:
+            raise BadRequest("sourceKey is required")
+        if not target_bucket:
+            raise BadRequest("targetBucket is required")
+
+        variables_raw = data.get('variables')
+        if variables_raw is None:
+            raise BadRequest("variables is required")
+
+        # Handle double-encoded strings (e.g., objectMapper.writeValueAsString applied twice)
+        if isinstance(variables_raw, str):
+            try:
+                decoded_once = json.loads(variables_raw)
+                variables_raw = decoded_once
+            except Exception:
+                pass
+            if isinstance(variables_raw, str) and (variables_raw.strip().startswith('{') or variables_raw.strip().startswith('[')):
                 try:
-                    decoded_once = json.loads(variables_raw)
-                    variables_raw = decoded_once
+                    variables_raw = json.loads(variables_raw)
                 except Exception:
                     pass
-                if isinstance(variables_raw, str) and (variables_raw.strip().startswith('{') or variables_raw.strip().startswith('[')):
-                    try:
-                        variables_raw = json.loads(variables_raw)
-                    except Exception:
-                        pass
 
-            variables = normalize_variables_input(variables_raw)
-            validate_variables_mapping(variables)
+        variables = normalize_variables_input(variables_raw)
+        validate_variables_mapping(variables)
 
-            try:
-                ttl_seconds = int(ttl_seconds_raw) if ttl_seconds_raw else 86400
-            except (ValueError, TypeError):
-                raise BadRequest("ttlSeconds must be an integer")
-
-            result = replace_from_s3_convert_and_upload(
-                source_bucket=source_bucket,
-                source_key=source_key,
-                variables=variables,
-                target_bucket=target_bucket,
-                target_prefix=target_prefix,
-                presign_ttl_seconds=ttl_seconds,
-            )
+        try:
+            ttl_seconds = int(ttl_seconds_raw) if ttl_seconds_raw else 86400
+        except (ValueError, TypeError):
+            raise BadRequest("ttlSeconds must be an integer")
 
-            return jsonify(result), 200
-        else:
-            # multipart/form-data path
-            source_bucket = request.form.get('sourceBucket')
-            source_key = request.form.get('sourceKey')
-            target_bucket = request.form.get('targetBucket')
-            target_prefix = request.form.get('targetPrefix')
-            ttl_seconds_raw = request.form.get('ttlSeconds')
-
-            if not source_bucket:
-                raise BadRequest("sourceBucket is required")
-            if not source_key:
-                raise BadRequest("sourceKey is required")
-            if not target_bucket:
-                raise BadRequest("targetBucket is required")
-
-            variables_json = request.form.get('variables')
-            if not variables_json:
-                raise BadRequest("variables is required and must be a JSON string")
-            try:
+        result = replace_from_s3_convert_and_upload(
+            source_bucket=source_bucket,
+            source_key=source_key,
+            variables=variables,
+            target_bucket=target_bucket,
+            target_prefix=target_prefix,
+            presign_ttl_seconds=ttl_seconds,
+        )
+
+        return jsonify(result), 200
+    else:
+        # multipart/form-data path
+        source_bucket = request.form.get('sourceBucket')
+        source_key = request.form.get('sourceKey')
+        target_bucket = request.form.get('targetBucket')
+        target_prefix = request.form.get('targetPrefix')
+        ttl_seconds_raw = request.form.get('ttlSeconds')
+
+        if not source_bucket:
+            raise BadRequest("sourceBucket is required")
+        if not source_key:
+            raise BadRequest("sourceKey is required")
+        if not target_bucket:
+            raise BadRequest("targetBucket is required")
+
+        variables_json = request.form.get('variables')
+        if not variables_json:
+            raise BadRequest("variables is required and must be a JSON string")
+        try:
+            variables_raw = json.loads(variables_json)
+        except json.JSONDecodeError:
+            # try to accept already-stringified arrays/objects without valid JSON wrapper
+            if variables_json.strip().startswith('{') or variables_json.strip().startswith('['):
                 variables_raw = json.loads(variables_json)
-            except json.JSONDecodeError:
-                # try to accept already-stringified arrays/objects without valid JSON wrapper
-                if variables_json.strip().startswith('{') or variables_json.strip().startswith('['):
-                    variables_raw = json.loads(variables_json)
-                else:
-                    raise BadRequest("Invalid JSON in variables field")
+            else:
+                raise BadRequest("Invalid JSON in variables field")
 
-            variables = normalize_variables_input(variables_raw)
-            validate_variables_mapping(variables)
+        variables = normalize_variables_input(variables_raw)
+        validate_variables_mapping(variables)
 
-            try:
-                ttl_seconds = int(ttl_seconds_raw) if ttl_seconds_raw else 86400
-            except ValueError:
-                raise BadRequest("ttlSeconds must be an integer")
-
-            result = replace_from_s3_convert_and_upload(
-                source_bucket=source_bucket,
-                source_key=source_key,
-                variables=variables,
-                target_bucket=target_bucket,
-                target_prefix=target_prefix,
-                presign_ttl_seconds=ttl_seconds,
-            )
+        try:
+            ttl_seconds = int(ttl_seconds_raw) if ttl_seconds_raw else 86400
+        except ValueError:
+            raise BadRequest("ttlSeconds must be an integer")
 
-            return jsonify(result), 200
+        result = replace_from_s3_convert_and_upload(
+            source_bucket=source_bucket,
+            source_key=source_key,
+            variables=variables,
+            target_bucket=target_bucket,
+            target_prefix=target_prefix,
+            presign_ttl_seconds=ttl_seconds,
+        )
 
-    except BadRequest as e:
-        return jsonify({'error': str(e)}), 400
-    except Exception as e:
-        return jsonify({
-            'error': 'Failed to replace from S3 and convert',
-            'message': str(e)
-        }), 500
+        return jsonify(result), 200
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -1,8 +1,17 @@
 """AWS Lambda handler for DOCX to PDF conversion API"""
 
+import os
+import threading
+
 import serverless_wsgi
 from app import app
 
+# Deployments that serve the S3 endpoints can opt in to building the S3 client in
+# the background during init; others skip loading boto3 entirely
+if os.environ.get('WARM_S3_CLIENT', '').lower() in ('1', 'true', 'yes'):
+    from services.s3_service import get_s3_client
+    threading.Thread(target=get_s3_client, daemon=True).start()
+
 def handler(event, context):
     """
     Handle HTTP events using serverless-wsgi adapter for Flask (WSGI)
@@ -1,164 +1,648 @@
 """DOCX file manipulation service"""
 
+import hashlib
 import re
-from typing import List, Dict, Optional, Tuple, Any
-from docx import Document
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+from bisect import bisect_right
+from typing import List, Dict, Optional, Tuple, Any, Iterator, Pattern, Union, BinaryIO
 from io import BytesIO
-from services.pdf_service import convert_docx_to_pdf
-from services.s3_service import (
-    upload_bytes_to_s3,
-    generate_presigned_get_url,
-    get_object_bytes,
-)
+from xml.sax.saxutils import escape, unescape
+from lxml import etree
 import os
+import posixpath
+import tempfile
 import uuid
 
 
-def extract_variables(docx_content: bytes) -> List[str]:
+# Shared pool for overlapping S3 network I/O with local work
+_IO_POOL = ThreadPoolExecutor(max_workers=4)
+
+# DOCX input: raw bytes or a seekable binary stream (e.g. an uploaded file)
+DocxSource = Union[bytes, BinaryIO]
+
+# Pattern to match {{variable_name}}
+_VAR_RE = re.compile(r'\{\{([^}]+)\}\}')
+
+# WordprocessingML namespace and the tags we care about
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+W_P = f'{{{W_NS}}}p'
+W_R = f'{{{W_NS}}}r'
+W_RPR = f'{{{W_NS}}}rPr'
+W_T = f'{{{W_NS}}}t'
+W_PROOF_ERR = f'{{{W_NS}}}proofErr'
+W_BR = f'{{{W_NS}}}br'
+W_TAB = f'{{{W_NS}}}tab'
+XML_SPACE = '{http://www.w3.org/XML/1998/namespace}space'
+
+# Package relationships (_rels/*.rels)
+REL_RELATIONSHIP = '{http://schemas.openxmlformats.org/package/2006/relationships}Relationship'
+
+# Parser settings for DOCX XML parts: never resolve entities or touch the network
+# (XXE-safe), allow very large documents, and skip xml:id indexing we never use
+_PARSER_OPTIONS = dict(
+    remove_blank_text=False,
+    huge_tree=True,
+    resolve_entities=False,
+    no_network=True,
+    collect_ids=False,
+)
+_XML_PARSER = etree.XMLParser(**_PARSER_OPTIONS)
+
+# Characters python-docx maps to <w:tab/> and <w:br/> when setting run text
+_BREAK_RE = re.compile(r'(\t|\r\n|\r|\n)')
+
+# Extraction results of recently seen templates, keyed by a digest of the DOCX
+_EXTRACT_CACHE: "OrderedDict[bytes, Tuple[str, ...]]" = OrderedDict()
+_EXTRACT_CACHE_SIZE = 128
+_extract_cache_lock = threading.Lock()
+
+# A <w:t> element in raw part XML: open tag, escaped text, close tag
+_RAW_T_RE = re.compile(r'(<w:t(?:\s[^>]*)?>)([^<]*)(</w:t>)')
+_RAW_SPACE_RE = re.compile(r'\sxml:space="[^"]*"')
+_RAW_ENTITIES = {'&quot;': '"', '&apos;': "'"}
+# Characters XML 1.0 forbids in text; values holding them go through lxml, which rejects them
+_XML_ILLEGAL_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+def _as_stream(docx_content: DocxSource) -> BinaryIO:
+    """Return a seekable binary stream over DOCX bytes or an already open file stream."""
+    if isinstance(docx_content, (bytes, bytearray)):
+        return BytesIO(docx_content)
+    if isinstance(docx_content, tempfile.SpooledTemporaryFile):
+        # Werkzeug spools uploads into one; before Python 3.11 it has no
+        # seekable(), which zipfile needs, so use the file it wraps
+        docx_content = docx_content._file
+    docx_content.seek(0)
+    return docx_content
+
+
+def _paragraph_text(p) -> str:
+    """Concatenate the <w:t> text of a <w:p> element."""
+    return ''.join(t.text or '' for t in p.iter(W_T))
+
+
+def _text_part_names(zf: zipfile.ZipFile) -> set:
+    """
+    Return the zip names of the DOCX parts that may contain variables
+    
+    The main document is found through the officeDocument relationship in
+    _rels/.rels, and its headers and footers through the main part's own
+    relationships, so documents whose main part is not word/document.xml
+    work too.
+    
+    Args:
+        zf: Open DOCX zip
+        
+    Returns:
+        Set of part names (body, headers, footers)
+    """
+    main = _rel_targets(zf, '', ('/officeDocument',))
+    main_name = min(main) if main else 'word/document.xml'
+    
+    directory, base = posixpath.split(main_name)
+    rels_name = posixpath.join(directory, '_rels', base + '.rels')
+    names = {main_name} | _rel_targets(zf, rels_name, ('/header', '/footer'))
+    return names & set(zf.namelist())
+
+
+def _rel_targets(zf: zipfile.ZipFile, rels_name: str, type_suffixes: Tuple[str, ...]) -> set:
+    """
+    Resolve the internal targets of relationships whose Type ends with one of type_suffixes
+    
+    Args:
+        zf: Open DOCX zip
+        rels_name: Relationships part, or '' for the package's _rels/.rels
+        type_suffixes: Relationship type endings to keep, e.g. ('/header',)
+        
+    Returns:
+        Set of zip names the matching relationships point to
+    """
+    rels_name = rels_name or '_rels/.rels'
+    try:
+        root = etree.fromstring(zf.read(rels_name), _XML_PARSER)
+    except (KeyError, etree.XMLSyntaxError):
+        return set()
+    
+    # Targets are relative to the folder that holds the _rels folder
+    source_dir = posixpath.dirname(posixpath.dirname(rels_name))
+    targets = set()
+    for rel in root.iter(REL_RELATIONSHIP):
+        if rel.get('TargetMode') == 'External':
+            continue
+        if not rel.get('Type', '').endswith(type_suffixes):
+            continue
+        target = rel.get('Target', '')
+        if target.startswith('/'):
+            targets.add(target.lstrip('/'))
+        else:
+            targets.add(posixpath.normpath(posixpath.join(source_dir, target)))
+    return targets
+
+
+def _iter_docx_text_parts(docx_content: DocxSource) -> Iterator[str]:
+    """
+    Stream the text of every paragraph in the body, headers and footers
+
+    Parses the XML parts straight from the DOCX zip with lxml iterparse,
+    clearing each paragraph once read so memory stays flat on large files.
+
+    Args:
+        docx_content: DOCX file as bytes or a binary file-like object
+
+    Yields:
+        Concatenated <w:t> text of each paragraph
+    """
+    with zipfile.ZipFile(_as_stream(docx_content)) as zf:
+        text_parts = _text_part_names(zf)
+        for name in zf.namelist():
+            if name not in text_parts:
+                continue
+            with zf.open(name) as part:
+                events = etree.iterparse(part, events=('end',), tag=W_P, **_PARSER_OPTIONS)
+                for _event, p in events:
+                    yield _paragraph_text(p)
+                    p.clear()
+
+
+def _content_digest(docx_content: DocxSource) -> bytes:
+    """Return a BLAKE2b digest of DOCX bytes, reading streams in chunks and rewinding them."""
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(docx_content, (bytes, bytearray)):
+        digest.update(docx_content)
+        return digest.digest()
+    
+    docx_content.seek(0)
+    for chunk in iter(lambda: docx_content.read(1024 * 1024), b''):
+        digest.update(chunk)
+    docx_content.seek(0)
+    return digest.digest()
+
+
+def extract_variables(docx_content: DocxSource) -> List[str]:
     """
     Extract all variables from DOCX file content
     
+    Results are cached by content digest, so a template uploaded again is
+    only hashed, not parsed.
+    
     Args:
-        docx_content: DOCX file as bytes
+        docx_content: DOCX file as bytes or a binary file-like object
         
     Returns:
         List of unique variable names (without {{}})
     """
-    doc = Document(BytesIO(docx_content))
-    variables = set()
+    key = _content_digest(docx_content)
+    with _extract_cache_lock:
+        cached = _EXTRACT_CACHE.get(key)
+        if cached is not None:
+            _EXTRACT_CACHE.move_to_end(key)
+            return list(cached)
     
-    # Pattern to match {{variable_name}}
-    pattern = r'\{\{([^}]+)\}\}'
-    
-    # Extract from paragraphs
-    for paragraph in doc.paragraphs:
-        matches = re.findall(pattern, paragraph.text)
-        variables.update(matches)
-    
-    # Extract from tables
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                matches = re.findall(pattern, cell.text)
-                variables.update(matches)
-    
-    # Extract from headers
-    for section in doc.sections:
-        if section.header:
-            for paragraph in section.header.paragraphs:
-                matches = re.findall(pattern, paragraph.text)
-                variables.update(matches)
-        
-        if section.footer:
-            for paragraph in section.footer.paragraphs:
-                matches = re.findall(pattern, paragraph.text)
-                variables.update(matches)
+    variables = _extract_variables_uncached(docx_content)
     
-    return sorted(list(variables))
+    with _extract_cache_lock:
+        _EXTRACT_CACHE[key] = tuple(variables)
+        if len(_EXTRACT_CACHE) > _EXTRACT_CACHE_SIZE:
+            _EXTRACT_CACHE.popitem(last=False)
+    return variables
+
+
+def _extract_variables_uncached(docx_content: DocxSource) -> List[str]:
+    """Parse the DOCX and return its sorted variable names (see extract_variables)."""
+    variables = set()
+    for text in _iter_docx_text_parts(docx_content):
+        # Most paragraphs hold no placeholder; the substring test is cheaper than findall
+        if '{{' in text:
+            variables.update(_VAR_RE.findall(text))
+    return sorted(variables)
 
 
-def replace_variables(docx_content: bytes, variables: Dict[str, str]) -> bytes:
+def replace_variables(docx_content: DocxSource, variables: Dict[str, str]) -> bytes:
     """
     Replace variables in DOCX file with provided values
     
     Args:
-        docx_content: DOCX file as bytes
+        docx_content: DOCX file as bytes or a binary file-like object
         variables: Dictionary mapping variable names to replacement values
         
     Returns:
         Modified DOCX file as bytes
     """
-    doc = Document(BytesIO(docx_content))
+    # Nothing to replace: skip the parse/serialize round-trip
+    if not variables:
+        return _as_stream(docx_content).read()
     
-    # Replace in paragraphs
-    for paragraph in doc.paragraphs:
-        _replace_in_paragraph(paragraph, variables)
+    return _rewrite_docx(docx_content, variables)
+
+
+def _rewrite_docx(
+    docx_content: DocxSource,
+    variables: Dict[str, str],
+    found: Optional[set] = None,
+    out: Optional[BinaryIO] = None,
+) -> Optional[bytes]:
+    """
+    Copy a DOCX zip, replacing variables in its body, header and footer XML
     
-    # Replace in tables
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for paragraph in cell.paragraphs:
-                    _replace_in_paragraph(paragraph, variables)
+    Only those parts are rewritten: by plain substitution on the raw XML when
+    _rewrite_part_raw allows it, otherwise by parsing them with lxml. Every
+    other entry, including embedded media, is copied across unchanged
+    without going through an object model.
     
-    # Replace in headers
-    for section in doc.sections:
-        if section.header:
-            for paragraph in section.header.paragraphs:
-                _replace_in_paragraph(paragraph, variables)
+    Args:
+        docx_content: DOCX file as bytes or a binary file-like object
+        variables: Dictionary mapping variable names to replacement values
+        found: Optional set that receives every variable name present in the
+            original text, so callers can extract and replace in one pass
+        out: Optional binary file to write the new zip into instead of
+            building it in memory
         
-        if section.footer:
-            for paragraph in section.footer.paragraphs:
-                _replace_in_paragraph(paragraph, variables)
+    Returns:
+        Modified DOCX file as bytes, or None when it was written to out
+    """
+    keys_pat = _keys_pattern(variables)
+    output = out if out is not None else BytesIO()
+    
+    # Values with tabs or line breaks need <w:tab/>/<w:br/> elements, values
+    # with XML-illegal characters must be rejected by lxml, and keys with
+    # braces can't be matched by _VAR_RE; all of these take the tree path
+    raw_ok = not any(
+        _BREAK_RE.search(value) or _XML_ILLEGAL_RE.search(value)
+        for value in variables.values()
+    ) and not any('{' in key or '}' in key for key in variables)
+    
+    with zipfile.ZipFile(_as_stream(docx_content)) as src, \
+            zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as dst:
+        text_parts = _text_part_names(src)
+        for info in src.infolist():
+            data = src.read(info)
+            if info.filename in text_parts:
+                rewritten = _rewrite_part_raw(data, variables, found) if raw_ok else None
+                if rewritten is not None:
+                    dst.writestr(info, rewritten)
+                    continue
+                root = etree.fromstring(data, _XML_PARSER)
+                # Materialize first so the tree is not mutated while it is being walked
+                for p in list(root.iter(W_P)):
+                    _replace_in_paragraph(p, variables, keys_pat, found)
+                data = etree.tostring(
+                    root, xml_declaration=True, encoding='UTF-8', standalone=True
+                )
+            dst.writestr(info, data)
     
-    # Save to bytes
-    output = BytesIO()
-    doc.save(output)
-    output.seek(0)
-    return output.read()
+    if out is not None:
+        return None
+    # getvalue() hands back the buffer without a seek + read copy
+    return output.getvalue()
+
+
+@contextmanager
+def _replaced_docx_file(
+    docx_content: DocxSource,
+    variables: Dict[str, str],
+    found: Optional[set] = None,
+) -> Iterator[str]:
+    """
+    Write the DOCX with variables replaced to a temporary file and yield its path
+    
+    Used ahead of PDF conversion, which needs the document on disk anyway,
+    so the rewritten zip never exists as a bytes object. The file is
+    removed on exit.
+    
+    Args:
+        docx_content: DOCX file as bytes or a binary file-like object
+        variables: Dictionary mapping variable names to replacement values
+        found: Optional set that receives every variable name present
+    """
+    fd, docx_path = tempfile.mkstemp(suffix='.docx')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            _rewrite_docx(docx_content, variables, found, out)
+        yield docx_path
+    finally:
+        os.remove(docx_path)
+
+
+def _rewrite_part_raw(
+    data: bytes,
+    variables: Dict[str, str],
+    found: Optional[set] = None,
+) -> Optional[bytes]:
+    """
+    Replace variables in a part by substituting inside its raw <w:t> text
+    
+    This skips building an lxml tree, but is only valid when every brace in
+    the text belongs to a placeholder that sits whole inside one <w:t>.
+    Anything else (split placeholders, stray braces, '{{' outside <w:t>,
+    character references, non UTF-8 parts) returns None so the caller
+    falls back to the tree path.
+    
+    Args:
+        data: Raw XML of a body, header or footer part
+        variables: Dictionary mapping variable names to replacement values
+        found: Optional set that receives every variable name in the part
+        
+    Returns:
+        The rewritten part, or None if the fast path does not apply
+    """
+    # No braces at all: nothing to find or replace, keep the part as is
+    if b'{' not in data:
+        return data
+    if b'&#' in data or b'<![CDATA[' in data:
+        return None
+    try:
+        xml = data.decode('utf-8')
+    except UnicodeDecodeError:
+        return None
+    
+    def substitute(vm):
+        value = variables.get(unescape(vm.group(1), _RAW_ENTITIES))
+        return vm.group(0) if value is None else escape(value)
+    
+    names = []
+    pieces = []
+    pos = 0
+    in_text = 0
+    for m in _RAW_T_RE.finditer(xml):
+        text = m.group(2)
+        if '{' not in text and '}' not in text:
+            continue
+        
+        # A stray brace could join a neighbouring <w:t> into a placeholder
+        rest = _VAR_RE.sub('', text)
+        if '{' in rest or '}' in rest:
+            return None
+        in_text += text.count('{{')
+        
+        touched = False
+        for vm in _VAR_RE.finditer(text):
+            name = unescape(vm.group(1), _RAW_ENTITIES)
+            if '{' in name:
+                return None
+            names.append(name)
+            touched = touched or name in variables
+        if not touched:
+            continue
+        
+        new_text = _VAR_RE.sub(substitute, text)
+        open_tag = _RAW_SPACE_RE.sub('', m.group(1))[:-1] + ' xml:space="preserve">'
+        pieces.append(xml[pos:m.start()])
+        pieces.append(open_tag + new_text + m.group(3))
+        pos = m.end()
+    
+    # '{{' elsewhere (attributes, other prefixes) means the text view differs
+    if in_text != xml.count('{{'):
+        return None
+    
+    if found is not None:
+        found.update(names)
+    if not pieces:
+        return data
+    pieces.append(xml[pos:])
+    return ''.join(pieces).encode('utf-8')
 
 
-def _replace_in_paragraph(paragraph, variables: Dict[str, str]) -> None:
+def _keys_pattern(variables: Dict[str, str]) -> Pattern[str]:
+    """Return a single alternation regex matching {{key}} for every provided key."""
+    return _compile_keys_pattern(tuple(sorted(variables)))
+
+
+@lru_cache(maxsize=128)
+def _compile_keys_pattern(keys: Tuple[str, ...]) -> Pattern[str]:
+    """Compile the {{key}} alternation once per distinct key set (batch runs reuse it)."""
+    return re.compile(
+        r'\{\{(' + '|'.join(re.escape(key) for key in keys) + r')\}\}'
+    )
+
+
+def _replace_in_paragraph(
+    p,
+    variables: Dict[str, str],
+    keys_pat: Pattern[str],
+    found: Optional[set] = None,
+) -> None:
     """
-    Replace variables in a paragraph's runs
+    Replace variables in a <w:p> element by editing its <w:t> text in place
+    
+    Runs and their <w:rPr> formatting are left untouched. A variable split
+    across several runs is written into the run where it starts and the
+    rest of its text is removed from the following runs.
     
     Args:
-        paragraph: Paragraph object from python-docx
+        p: <w:p> lxml element
         variables: Dictionary mapping variable names to replacement values
+        keys_pat: Compiled pattern from _keys_pattern(variables)
+        found: Optional set that receives every variable name in the
+            paragraph's original text, read from the same walk of its <w:t>
     """
-    # Get the full text of the paragraph
-    full_text = paragraph.text
+    t_nodes = list(p.iter(W_T))
+    texts = [t.text or '' for t in t_nodes]
+    full_text = ''.join(texts)
     
-    # Check if any variables exist in the text
-    if not any(f'{{{{{key}}}}}' in full_text for key in variables.keys()):
+    # Skip paragraphs without any of the provided variables; most have no '{{'
+    # at all, which a substring check rejects faster than the regex
+    if '{{' not in full_text:
         return
+    if found is not None:
+        found.update(_VAR_RE.findall(full_text))
+    matches = list(keys_pat.finditer(full_text))
+    if not matches:
+        return
+    
+    # Collapse runs Word split apart so most placeholders sit in one <w:t>;
+    # the text is unchanged, only the node list needs refreshing
+    if _merge_adjacent_runs(p):
+        t_nodes = list(p.iter(W_T))
+        texts = [t.text or '' for t in t_nodes]
     
-    # Clear the paragraph
-    paragraph.clear()
+    # Offset of each <w:t> within the paragraph text
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text)
     
-    # Split the text by variable patterns and build new runs
-    pattern = r'(\{\{[^}]+\}\})'
-    parts = re.split(pattern, full_text)
+    # Work backwards so the offsets of earlier matches stay valid
+    touched = set()
+    for match in reversed(matches):
+        start, end = match.span()
+        replacement = variables[match.group(1)]
+        i = bisect_right(starts, start) - 1
+        
+        first = t_nodes[i]
+        head = first.text[:start - starts[i]]
+        if end <= starts[i] + len(texts[i]):
+            first.text = head + replacement + first.text[end - starts[i]:]
+        else:
+            first.text = head + replacement
+            for j in range(i + 1, len(t_nodes)):
+                if starts[j] >= end:
+                    break
+                # An empty <w:t/> reads back as None from lxml
+                t_nodes[j].text = (t_nodes[j].text or '')[end - starts[j]:]
+                touched.add(j)
+        touched.add(i)
     
-    for part in parts:
-        if part.startswith('{{') and part.endswith('}}'):
-            # This is a variable
-            var_name = part[2:-2]  # Remove {{ and }}
-            replacement = variables.get(var_name, part)  # Keep original if not found
-            paragraph.add_run(replacement)
+    for i in touched:
+        t = t_nodes[i]
+        t.set(XML_SPACE, 'preserve')
+        _expand_breaks(t)
+
+
+def _merge_adjacent_runs(p) -> bool:
+    """
+    Merge neighbouring text-only runs of a <w:p> that share identical <w:rPr>
+    
+    Word often splits "{{name}}" over several runs with the same formatting
+    (spell-check marks, revision ids). Spell-check markers (<w:proofErr/>)
+    between runs are dropped as part of the merge.
+    
+    Args:
+        p: <w:p> lxml element
+        
+    Returns:
+        True if the paragraph was modified
+    """
+    changed = False
+    prev_t = None
+    prev_key = None
+    
+    for child in list(p):
+        if child.tag == W_PROOF_ERR:
+            p.remove(child)
+            changed = True
+            continue
+        
+        t = _single_text(child) if child.tag == W_R else None
+        if t is None:
+            prev_t = None
+            continue
+        
+        rpr = child.find(W_RPR)
+        key = etree.tostring(rpr) if rpr is not None else b''
+        if prev_t is not None and key == prev_key:
+            prev_t.text = (prev_t.text or '') + (t.text or '')
+            prev_t.set(XML_SPACE, 'preserve')
+            p.remove(child)
+            changed = True
         else:
-            # Regular text
-            if part:
-                paragraph.add_run(part)
+            prev_t = t
+            prev_key = key
+    
+    return changed
+
+
+def _single_text(r):
+    """Return the only <w:t> of a run holding nothing but <w:rPr> and that <w:t>, else None."""
+    t = None
+    for child in r:
+        if child.tag == W_T and t is None:
+            t = child
+        elif child.tag != W_RPR:
+            return None
+    return t
+
+
+def _expand_breaks(t) -> None:
+    """Turn tabs and line breaks in a <w:t> into <w:tab/> and <w:br/> siblings, like python-docx."""
+    parts = _BREAK_RE.split(t.text)
+    if len(parts) == 1:
+        return
+    
+    t.text = parts[0]
+    anchor = t
+    for i, part in enumerate(parts[1:]):
+        if i % 2 == 0:
+            el = t.makeelement(W_TAB if part == '\t' else W_BR)
+        elif part:
+            el = t.makeelement(W_T)
+            el.text = part
+            el.set(XML_SPACE, 'preserve')
+        else:
+            continue
+        anchor.addnext(el)
+        anchor = el
+
+
+def replace_variables_and_convert_pdf(
+    docx_content: DocxSource,
+    variables: Dict[str, str],
+) -> bytes:
+    """
+    Replace variables in a DOCX and convert the result to PDF.
+
+    Kept at module level so it can be submitted to a process pool.
+
+    Args:
+        docx_content: DOCX bytes (or a binary stream when run in-process).
+        variables: Mapping of variable names to replacement values.
+
+    Returns:
+        PDF file as bytes.
+    """
+    from services.pdf_service import convert_docx_to_pdf
+
+    if not variables:
+        return convert_docx_to_pdf(docx_content)
+    with _replaced_docx_file(docx_content, variables) as docx_path:
+        return convert_docx_to_pdf(docx_path)
 
 
 def extract_variables_and_convert_pdf(
-    docx_content: bytes,
+    docx_content: DocxSource,
     variables: Optional[Dict[str, str]] = None,
 ) -> Tuple[List[str], bytes]:
     """
     Extract variables and convert DOCX (optionally with replacements) to PDF.
 
     Args:
-        docx_content: Original DOCX bytes.
+        docx_content: Original DOCX bytes or binary stream.
         variables: Optional mapping for replacements. If provided, replacements are applied before PDF conversion.
 
     Returns:
         A tuple of (variables_list, pdf_bytes).
     """
-    extracted_variables = extract_variables(docx_content)
+    from services.pdf_service import convert_docx_to_pdf
+
+    with _extract_and_apply(docx_content, variables) as (docx_for_conversion, extracted_variables):
+        pdf_bytes = convert_docx_to_pdf(docx_for_conversion)
+    return extracted_variables, pdf_bytes
 
+
+@contextmanager
+def _extract_and_apply(
+    docx_content: DocxSource,
+    variables: Optional[Dict[str, str]],
+) -> Iterator[Tuple[Union[DocxSource, str], List[str]]]:
+    """
+    Extract variables and (optionally) replace them using a single parse of the DOCX.
+
+    Args:
+        docx_content: Original DOCX bytes or binary stream.
+        variables: Optional mapping for replacements.
+
+    Yields:
+        A tuple of (docx_for_conversion, variables_list). When no
+        replacements are requested the original input is yielded untouched;
+        otherwise the path of a temporary DOCX that is removed on exit.
+    """
     # If variables provided, replace before converting; otherwise convert original
-    docx_for_conversion = (
-        replace_variables(docx_content, variables) if variables else docx_content
-    )
+    if not variables:
+        yield docx_content, extract_variables(docx_content)
+        return
 
-    pdf_bytes = convert_docx_to_pdf(docx_for_conversion)
-    return extracted_variables, pdf_bytes
+    found = set()
+    with _replaced_docx_file(docx_content, variables, found) as docx_path:
+        yield docx_path, sorted(found)
 
 
 def extract_convert_upload_get_url(
-    docx_content: bytes,
+    docx_content: DocxSource,
     variables: Optional[Dict[str, str]] = None,
     bucket_name: str = "assinaai-temp",
     s3_prefix: Optional[str] = None,
@@ -168,7 +652,7 @@ def extract_convert_upload_get_url(
     Extract variables, (optionally) replace, convert to PDF, upload to S3, return details.
 
     Args:
-        docx_content: DOCX bytes input.
+        docx_content: DOCX bytes or binary stream input.
         variables: Optional mapping to replace in DOCX prior to conversion.
         bucket_name: S3 bucket to upload the PDF to.
         s3_prefix: Optional key prefix in the bucket.
@@ -180,28 +664,41 @@ def extract_convert_upload_get_url(
           - pdfKey: str
           - presignedUrl: str
     """
-    extracted_variables = extract_variables(docx_content)
-    final_docx = replace_variables(docx_content, variables) if variables else docx_content
-    pdf_bytes = convert_docx_to_pdf(final_docx)
-
-    # Key generation: optional prefix + uuid-based filename
-    prefix = (s3_prefix or "generated-pdfs").strip("/")
-    unique_id = uuid.uuid4().hex
-    key = f"{prefix}/{unique_id}.pdf" if prefix else f"{unique_id}.pdf"
-
-    # Upload with content type
-    upload_bytes_to_s3(
-        bucket=bucket_name,
-        key=key,
-        data=pdf_bytes,
-        content_type="application/pdf",
-    )
+    # Imported here so extraction-only callers never load boto3
+    from services.pdf_service import convert_docx_to_pdf_to_file, prepare_converter
+    from services.s3_service import upload_file_to_s3, generate_presigned_get_url
+
+    # Locate LibreOffice while the DOCX is being parsed
+    converter_future = _IO_POOL.submit(prepare_converter)
+    with _extract_and_apply(docx_content, variables) as (final_docx, extracted_variables):
+        converter_future.result()
+        pdf_path = convert_docx_to_pdf_to_file(final_docx)
+
+    try:
+        # Key generation: optional prefix + uuid-based filename
+        prefix = (s3_prefix or "generated-pdfs").strip("/")
+        unique_id = uuid.uuid4().hex
+        key = f"{prefix}/{unique_id}.pdf" if prefix else f"{unique_id}.pdf"
+
+        # Upload straight from the temp file in the background
+        upload_future = _IO_POOL.submit(
+            upload_file_to_s3,
+            bucket=bucket_name,
+            key=key,
+            path=pdf_path,
+            content_type="application/pdf",
+        )
+
+        # Signing only needs the key, so it overlaps with the upload
+        url = generate_presigned_get_url(
+            bucket=bucket_name,
+            key=key,
+            expires_in_seconds=presign_ttl_seconds,
+        )
+        upload_future.result()
+    finally:
+        os.remove(pdf_path)
 
-    url = generate_presigned_get_url(
-        bucket=bucket_name,
-        key=key,
-        expires_in_seconds=presign_ttl_seconds,
-    )
     return {
         "variables": extracted_variables,
         "pdfKey": key,
@@ -231,28 +728,38 @@ def replace_from_s3_convert_and_upload(
     Returns:
         Dict with keys: variables (comma-joined string), pdfKey, pdfUrl
     """
-    # Download original DOCX
-    original_docx = get_object_bytes(source_bucket, source_key)
+    from services.pdf_service import convert_docx_to_pdf_to_file, prepare_converter
+    from services.s3_service import upload_file_to_s3, get_object_bytes
 
-    # Replace variables
-    normalized_vars = normalize_variables_input(variables)
-    modified_docx = replace_variables(original_docx, normalized_vars)
+    # Download original DOCX while LibreOffice is located
+    converter_future = _IO_POOL.submit(prepare_converter)
+    download_future = _IO_POOL.submit(get_object_bytes, source_bucket, source_key)
 
-    # Convert to PDF
-    pdf_bytes = convert_docx_to_pdf(modified_docx)
+    # Replace variables and convert to PDF
+    normalized_vars = normalize_variables_input(variables)
+    original_docx = download_future.result()
+    converter_future.result()
+    if normalized_vars:
+        with _replaced_docx_file(original_docx, normalized_vars) as docx_path:
+            pdf_path = convert_docx_to_pdf_to_file(docx_path)
+    else:
+        pdf_path = convert_docx_to_pdf_to_file(original_docx)
 
     # Build key for PDF only
     prefix = (target_prefix or "processed").strip("/")
     base_id = uuid.uuid4().hex
     pdf_key = f"{prefix}/{base_id}.pdf" if prefix else f"{base_id}.pdf"
 
-    # Upload PDF only
-    upload_bytes_to_s3(
-        bucket=target_bucket,
-        key=pdf_key,
-        data=pdf_bytes,
-        content_type="application/pdf",
-    )
+    # Upload PDF only, streamed from the temp file
+    try:
+        upload_file_to_s3(
+            bucket=target_bucket,
+            key=pdf_key,
+            path=pdf_path,
+            content_type="application/pdf",
+        )
+    finally:
+        os.remove(pdf_path)
 
     # Presigned URL (optional)
     # pdf_url = generate_presigned_get_url(target_bucket, pdf_key, presign_ttl_seconds)
@@ -274,28 +781,26 @@ def normalize_variables_input(variables_input: Any) -> Dict[str, str]:
     if variables_input is None:
         return {}
 
+    # Comprehensions with str() only for non-str values: JSON payloads are
+    # almost always strings already. Empty names are dropped afterwards.
     if isinstance(variables_input, dict):
-        normalized: Dict[str, str] = {}
-        for k, v in variables_input.items():
-            key_str = str(k)
-            value_str = "" if v is None else str(v)
-            if key_str:
-                normalized[key_str] = value_str
+        normalized = {
+            (k if type(k) is str else str(k)):
+                (v if type(v) is str else "" if v is None else str(v))
+            for k, v in variables_input.items()
+        }
+        normalized.pop("", None)
         return normalized
 
     if isinstance(variables_input, list):
-        normalized: Dict[str, str] = {}
-        for item in variables_input:
-            if not isinstance(item, dict):
-                continue
-            name = item.get("name")
-            if name is None:
-                continue
-            value = item.get("value", "")
-            name_str = str(name)
-            value_str = "" if value is None else str(value)
-            if name_str:
-                normalized[name_str] = value_str
+        normalized = {
+            (name if type(name) is str else str(name)):
+                (value if type(value) is str else "" if value is None else str(value))
+            for item in variables_input if isinstance(item, dict)
+            for name, value in ((item.get("name"), item.get("value", "")),)
+            if name is not None
+        }
+        normalized.pop("", None)
         return normalized
 
     raise ValueError("variables must be a dict or an array of objects with name/value")
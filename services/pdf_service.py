@@ -1,17 +1,84 @@
 """PDF conversion service"""
 
+import atexit
 import os
 import shutil
+import socket
 import stat
 import subprocess
 import tarfile
 import tempfile
+import threading
+import time
 import zipfile
+from collections import deque
 from io import BytesIO
+from typing import BinaryIO, Optional, Union
 from urllib.request import urlretrieve
 
+try:
+    from unoserver.client import UnoClient  # type: ignore
+except Exception:
+    UnoClient = None
+
+# Python Brotli decoder for .tar.br layer archives, resolved once at import
+try:
+    import brotli as _brotli  # type: ignore
+except Exception:
+    try:
+        import brotlicffi as _brotli  # type: ignore
+    except Exception:
+        _brotli = None
+_brotli_decompress = _brotli.decompress if _brotli is not None else None
+
+# Address of a running unoserver (https://github.com/unoconv/unoserver). When
+# UNOSERVER_PORT is set, conversions go through that long-lived LibreOffice
+# instance instead of starting soffice for every request.
+UNOSERVER_HOST = os.environ.get("UNOSERVER_HOST", "127.0.0.1")
+UNOSERVER_PORT = os.environ.get("UNOSERVER_PORT")
+
+# With LIBREOFFICE_DAEMON=1 and no external unoserver, each process starts its
+# own unoserver on first use and keeps it for later conversions. Leave it unset
+# on Lambda, where single-shot invocations use the soffice subprocess path.
+LIBREOFFICE_DAEMON = os.environ.get("LIBREOFFICE_DAEMON", "").lower() in ("1", "true", "yes")
+
+# Resolved soffice path, so the /opt search and layer extraction run at most
+# once per process
+_SOFFICE_PATH: Optional[str] = None
+
+# Directory names soffice is usually found under, searched before their siblings
+_SOFFICE_DIR_HINTS = frozenset({'program', 'MacOS', 'bin', 'opt', 'lo', 'instdir'})
+
+_daemon_lock = threading.Lock()
+_daemon_proc = None
+_daemon_port = None
+
 
 def _find_libreoffice():
+    """
+    Find LibreOffice executable, honoring SOFFICE_PATH and caching the result
+    
+    Returns:
+        str: Path to LibreOffice executable
+        
+    Raises:
+        Exception: If LibreOffice is not found
+    """
+    global _SOFFICE_PATH
+    
+    # An explicit override skips discovery entirely
+    env_path = os.environ.get('SOFFICE_PATH')
+    if env_path and os.path.exists(env_path):
+        return env_path
+    
+    if _SOFFICE_PATH and os.path.exists(_SOFFICE_PATH):
+        return _SOFFICE_PATH
+    
+    _SOFFICE_PATH = _discover_libreoffice()
+    return _SOFFICE_PATH
+
+
+def _discover_libreoffice():
     """
     Find LibreOffice executable in local system or Lambda environment
     
@@ -53,13 +120,9 @@ def _find_libreoffice():
     
     # Search for soffice.bin in /opt directory recursively
     if os.path.exists('/opt'):
-        for root, dirs, files in os.walk('/opt'):
-            if 'soffice.bin' in files:
-                found_path = os.path.join(root, 'soffice.bin')
-                return found_path
-            if 'soffice' in files:
-                found_path = os.path.join(root, 'soffice')
-                return found_path
+        found_path = _scan_for_soffice('/opt')
+        if found_path:
+            return found_path
 
         # Some layers ship a compressed archive, e.g., lo.tar.br. Unpack into /tmp and retry.
         try:
@@ -93,29 +156,15 @@ def _find_libreoffice():
                             _copytree_merge(src, dst)
                         else:
                             os.makedirs(os.path.dirname(dst), exist_ok=True)
-                            shutil.copy2(src, dst)
+                            _link_or_copy(src, dst)
                     except Exception:
                         pass
 
-            # After extraction, look for soffice again in /tmp
-            for r, _d, f in os.walk(work_dir):
-                if 'soffice.bin' in f:
-                    path = os.path.join(r, 'soffice.bin')
-                    _ensure_executable(path)
-                    return path
-                if 'soffice' in f:
-                    path = os.path.join(r, 'soffice')
-                    _ensure_executable(path)
-                    return path
-
-            # Also search under /tmp where we merged opt/
-            for r, _d, f in os.walk('/tmp'):
-                if 'soffice.bin' in f:
-                    path = os.path.join(r, 'soffice.bin')
-                    _ensure_executable(path)
-                    return path
-                if 'soffice' in f:
-                    path = os.path.join(r, 'soffice')
+            # After extraction, look for soffice again in /tmp, then under
+            # /tmp where we merged opt/
+            for search_root in (work_dir, '/tmp'):
+                path = _scan_for_soffice(search_root)
+                if path:
                     _ensure_executable(path)
                     return path
     
@@ -131,6 +180,46 @@ def _find_libreoffice():
     )
 
 
+def _scan_for_soffice(root: str) -> Optional[str]:
+    """
+    Breadth-first search under root for soffice.bin (preferred) or soffice
+    
+    Uses os.scandir so entry types come from the directory listing without
+    extra stat calls, visits directories LibreOffice usually lives in
+    (program, bin, libreoffice*, ...) before their siblings, and stops at
+    the first directory holding a match.
+    
+    Returns:
+        Path to the executable, or None if there is none under root
+    """
+    queue = deque([root])
+    while queue:
+        directory = queue.popleft()
+        names = set()
+        preferred = []
+        others = []
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        name = entry.name
+                        if name in _SOFFICE_DIR_HINTS or name.startswith('libreoffice'):
+                            preferred.append(entry.path)
+                        else:
+                            others.append(entry.path)
+                    elif entry.name in ('soffice.bin', 'soffice') and not entry.is_dir():
+                        names.add(entry.name)
+        except OSError:
+            continue
+        
+        for name in ('soffice.bin', 'soffice'):
+            if name in names:
+                return os.path.join(directory, name)
+        queue.extend(preferred)
+        queue.extend(others)
+    return None
+
+
 def _get_debug_info():
     """Get diagnostic information about the Lambda environment"""
     info = []
@@ -181,10 +270,35 @@ def _get_debug_info():
     # Runtime download removed by design
 
 
+# Directories of a LibreOffice install that a headless conversion never reads
+_SKIPPED_ARCHIVE_DIRS = (
+    '/help/', '/readmes/',
+    '/share/autotext/', '/share/gallery/',
+    '/share/template/', '/share/wizards/', '/share/xdg/',
+)
+
+
+def _wanted_member(name: str) -> bool:
+    """Return False for archive members under one of _SKIPPED_ARCHIVE_DIRS."""
+    path = '/' + name.replace('\\', '/')
+    return not any(skipped in path for skipped in _SKIPPED_ARCHIVE_DIRS)
+
+
+def _extract_tar(tf: tarfile.TarFile, extract_dir: str) -> None:
+    """Extract the members of an open tar archive that pass _wanted_member."""
+    tf.extractall(extract_dir, members=[m for m in tf if _wanted_member(m.name)])
+
+
+def _extract_zip(zf: zipfile.ZipFile, extract_dir: str) -> None:
+    """Extract the members of an open zip archive that pass _wanted_member."""
+    zf.extractall(extract_dir, members=[n for n in zf.namelist() if _wanted_member(n)])
+
+
 def _extract_archive(archive_path: str, extract_dir: str) -> None:
     """Extract supported archives into extract_dir.
 
-    Supports: .zip, .tar.gz/.tgz, .tar.br (Brotli).
+    Supports: .zip, .tar.gz/.tgz, .tar.br (Brotli). Help, sample and other
+    unused directories are skipped (see _SKIPPED_ARCHIVE_DIRS).
     For .tar.br, it tries the brotli CLI if available, falling back to the
     Python brotli module.
     """
@@ -192,12 +306,12 @@ def _extract_archive(archive_path: str, extract_dir: str) -> None:
 
     if lower.endswith(".zip"):
         with zipfile.ZipFile(archive_path, "r") as zf:
-            zf.extractall(extract_dir)
+            _extract_zip(zf, extract_dir)
         return
 
     if lower.endswith(".tar.gz") or lower.endswith(".tgz"):
         with tarfile.open(archive_path, "r:gz") as tf:
-            tf.extractall(extract_dir)
+            _extract_tar(tf, extract_dir)
         return
 
     if lower.endswith(".tar.br") or lower.endswith(".tbr") or lower.endswith(".tar.brotli") or lower.endswith(".br"):
@@ -224,42 +338,52 @@ def _extract_archive(archive_path: str, extract_dir: str) -> None:
 
         if used_cli and os.path.exists(tar_output_path):
             with tarfile.open(tar_output_path, "r:") as tf:
-                tf.extractall(extract_dir)
+                _extract_tar(tf, extract_dir)
             return
 
         # Fallback: use Python brotli/brotlicffi module to decompress in-memory
-        _brotli = None
-        try:
-            import brotli as _brotli  # type: ignore
-        except Exception:
-            try:
-                import brotlicffi as _brotli  # type: ignore
-            except Exception as e:
-                raise Exception(
-                    "Brotli CLI not found and neither 'brotli' nor 'brotlicffi' Python modules are available. "
-                    "Add 'brotlicffi' (preferred for Lambda) or a compatible 'brotli' wheel to requirements, "
-                    "or include a layer that provides the 'brotli' CLI at /opt/bin/brotli."
-                ) from e
+        if _brotli_decompress is None:
+            raise Exception(
+                "Brotli CLI not found and neither 'brotli' nor 'brotlicffi' Python modules are available. "
+                "Add 'brotlicffi' (preferred for Lambda) or a compatible 'brotli' wheel to requirements, "
+                "or include a layer that provides the 'brotli' CLI at /opt/bin/brotli."
+            )
         with open(archive_path, "rb") as f:
             compressed_data = f.read()
-        decompressed = _brotli.decompress(compressed_data)
+        decompressed = _brotli_decompress(compressed_data)
         with tarfile.open(fileobj=BytesIO(decompressed), mode="r:") as tf:
-            tf.extractall(extract_dir)
+            _extract_tar(tf, extract_dir)
         return
 
     # Last resort: try zip (many vendors ship .zip regardless of extension)
     try:
         with zipfile.ZipFile(archive_path, "r") as zf:
-            zf.extractall(extract_dir)
+            _extract_zip(zf, extract_dir)
             return
     except Exception as e:
         raise Exception(f"Unsupported archive format: {archive_path}. {e}")
 
 
+def _link_or_copy(src: str, dst: str) -> None:
+    """Hardlink src to dst, falling back to a symlink and then to a real copy."""
+    if os.path.lexists(dst):
+        # Already linked by an earlier merge; otherwise replace it like copy2 did
+        if os.path.exists(dst) and os.path.samefile(src, dst):
+            return
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+    except OSError:
+        try:
+            os.symlink(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
+
 def _copytree_merge(src: str, dst: str) -> None:
-    """Recursively copy src into dst, merging if dst exists."""
+    """Recursively link (or copy) src into dst, merging if dst exists."""
     if not os.path.exists(dst):
-        shutil.copytree(src, dst)
+        shutil.copytree(src, dst, symlinks=True, copy_function=_link_or_copy)
         return
     for name in os.listdir(src):
         s = os.path.join(src, name)
@@ -268,7 +392,7 @@ def _copytree_merge(src: str, dst: str) -> None:
             _copytree_merge(s, d)
         else:
             os.makedirs(os.path.dirname(d), exist_ok=True)
-            shutil.copy2(s, d)
+            _link_or_copy(s, d)
 
 
 def _ensure_executable(path: str) -> None:
@@ -280,21 +404,165 @@ def _ensure_executable(path: str) -> None:
         pass
 
 
-def convert_docx_to_pdf(docx_content: bytes) -> bytes:
+def _free_port() -> int:
+    """Return a currently unused local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _ensure_soffice_daemon(libreoffice_path: str) -> Optional[str]:
     """
-    Convert DOCX file to PDF using LibreOffice
+    Start, once per process, a unoserver driving a listening soffice
+    
+    A daemon that has exited is started again on the next call.
     
     Args:
-        docx_content: DOCX file as bytes
+        libreoffice_path: soffice executable the daemon should run
         
     Returns:
-        PDF file as bytes
+        Port of the running unoserver, or None if unoserver is not installed
         
     Raises:
-        Exception: If conversion fails
+        Exception: If the daemon does not come up
+    """
+    global _daemon_proc, _daemon_port
+    
+    with _daemon_lock:
+        if _daemon_proc is not None and _daemon_proc.poll() is None:
+            return _daemon_port
+        
+        unoserver_path = shutil.which('unoserver')
+        if not unoserver_path:
+            return None
+        
+        port = str(_free_port())
+        # A LibreOffice profile cannot be shared, so each process gets its own
+        profile_dir = os.path.join(tempfile.gettempdir(), f'lo-daemon-profile-{os.getpid()}')
+        env = os.environ.copy()
+        env.setdefault("HOME", "/tmp")
+        proc = subprocess.Popen(
+            [
+                unoserver_path,
+                '--interface', '127.0.0.1', '--port', port,
+                '--uno-port', str(_free_port()),
+                '--executable', libreoffice_path,
+                '--user-installation', f'file://{profile_dir}'
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            env=env
+        )
+        
+        # Poll until the daemon accepts connections
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                with socket.create_connection(('127.0.0.1', int(port)), timeout=1):
+                    break
+            except OSError:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    proc.kill()
+                    raise Exception("LibreOffice daemon failed to start")
+                time.sleep(0.1)
+        
+        atexit.register(proc.terminate)
+        _daemon_proc, _daemon_port = proc, port
+        return port
+
+
+def _convert_with_unoserver(
+    docx_path: str,
+    pdf_path: str,
+    host: str = UNOSERVER_HOST,
+    port: Optional[str] = UNOSERVER_PORT,
+) -> None:
+    """
+    Convert docx_path to pdf_path through the unoserver at host:port
+
+    Uses the unoserver Python client when installed, otherwise the
+    'unoconvert' command line client.
+    """
+    if UnoClient is not None:
+        client = UnoClient(server=host, port=port)
+        client.convert(inpath=docx_path, outpath=pdf_path, convert_to="pdf")
+        return
+
+    result = subprocess.run(
+        [
+            'unoconvert',
+            '--host', host, '--port', port,
+            '--convert-to', 'pdf',
+            docx_path, pdf_path
+        ],
+        capture_output=True,
+        text=True,
+        timeout=120
+    )
+    if result.returncode != 0:
+        raise Exception(f"unoserver conversion failed: {result.stderr}")
+
+
+def _convert_with_soffice(libreoffice_path: str, docx_path: str, out_dir: str) -> None:
+    """Convert docx_path to PDF in out_dir by starting a headless soffice process."""
+    # Convert DOCX to PDF using LibreOffice
+    # --headless: run without GUI
+    # --convert-to pdf: convert to PDF format
+    # --outdir: output directory
+    # Set HOME to a writable location to avoid first-run setup issues
+    env = os.environ.copy()
+    env.setdefault("HOME", "/tmp")
+    result = subprocess.run(
+        [
+            libreoffice_path,
+            '--headless', '--nologo', '--nodefault', '--invisible', '--nofirststartwizard',
+            '--convert-to', 'pdf',
+            '--outdir', out_dir,
+            docx_path
+        ],
+        capture_output=True,
+        text=True,
+        timeout=120,
+        env=env
+    )
+    
+    if result.returncode != 0:
+        raise Exception(f"LibreOffice conversion failed: {result.stderr}")
+
+
+def prepare_converter() -> None:
     """
-    # Find LibreOffice executable
+    Resolve the LibreOffice executable (and start the daemon when enabled) ahead of a conversion
+    
+    Safe to run in a background thread while the DOCX is still being
+    prepared; convert_docx_to_pdf then finds everything already cached.
+    
+    Raises:
+        Exception: If LibreOffice is not found
+    """
+    if UNOSERVER_PORT:
+        return
     libreoffice_path = _find_libreoffice()
+    if LIBREOFFICE_DAEMON:
+        _ensure_soffice_daemon(libreoffice_path)
+
+
+def convert_docx_to_pdf_to_file(docx_content: Union[bytes, BinaryIO, str]) -> str:
+    """
+    Convert DOCX file to PDF using LibreOffice, leaving the PDF on disk
+    
+    Args:
+        docx_content: DOCX file as bytes, a binary file-like object, or the
+            path of a DOCX already on disk
+        
+    Returns:
+        Path of a temporary PDF file; the caller is responsible for removing it
+        
+    Raises:
+        Exception: If conversion fails
+    """
+    # Find LibreOffice executable (not needed when a unoserver is configured)
+    libreoffice_path = None if UNOSERVER_PORT else _find_libreoffice()
     
     # Create temporary directory
     temp_dir = tempfile.mkdtemp()
@@ -303,44 +571,38 @@ def convert_docx_to_pdf(docx_content: bytes) -> bytes:
     
     try:
         # Write DOCX content to temporary file
-        with open(docx_path, 'wb') as docx_file:
-            docx_file.write(docx_content)
+        if isinstance(docx_content, str):
+            # Already on disk: link it into the work directory rather than copy
+            _link_or_copy(docx_content, docx_path)
+        else:
+            with open(docx_path, 'wb') as docx_file:
+                if isinstance(docx_content, (bytes, bytearray)):
+                    docx_file.write(docx_content)
+                else:
+                    # Stream uploads straight to disk without an in-memory copy
+                    docx_content.seek(0)
+                    shutil.copyfileobj(docx_content, docx_file)
         
-        # Convert DOCX to PDF using LibreOffice
-        # --headless: run without GUI
-        # --convert-to pdf: convert to PDF format
-        # --outdir: output directory
-        # Set HOME to a writable location to avoid first-run setup issues
-        env = os.environ.copy()
-        env.setdefault("HOME", "/tmp")
-        result = subprocess.run(
-            [
-                libreoffice_path,
-                '--headless', '--nologo', '--nodefault', '--invisible', '--nofirststartwizard',
-                '--convert-to', 'pdf',
-                '--outdir', temp_dir,
-                docx_path
-            ],
-            capture_output=True,
-            text=True,
-            timeout=120,
-            env=env
-        )
+        daemon_port = None
+        if LIBREOFFICE_DAEMON and not UNOSERVER_PORT:
+            daemon_port = _ensure_soffice_daemon(libreoffice_path)
         
-        if result.returncode != 0:
-            raise Exception(f"LibreOffice conversion failed: {result.stderr}")
+        if UNOSERVER_PORT:
+            _convert_with_unoserver(docx_path, pdf_path)
+        elif daemon_port:
+            _convert_with_unoserver(docx_path, pdf_path, '127.0.0.1', daemon_port)
+        else:
+            _convert_with_soffice(libreoffice_path, docx_path, temp_dir)
         
         # LibreOffice creates PDF with the same base name as the input file
-        pdf_file_path = os.path.join(temp_dir, 'document.pdf')
-        
-        if not os.path.exists(pdf_file_path):
+        if not os.path.exists(pdf_path):
             raise Exception("PDF file was not created")
         
-        # Read PDF content
-        with open(pdf_file_path, 'rb') as pdf_file:
-            pdf_content = pdf_file.read()
-        
-        return pdf_content
+        # Move the PDF out of the work directory before it is removed
+        fd, out_path = tempfile.mkstemp(suffix='.pdf')
+        os.close(fd)
+        os.replace(pdf_path, out_path)
+        return out_path
     
     finally:
         # Clean up temporary files and directory
@@ -350,3 +612,25 @@ def convert_docx_to_pdf(docx_content: bytes) -> bytes:
                 shutil.rmtree(temp_dir)
         except Exception:
             pass  # Ignore cleanup errors
+
+
+def convert_docx_to_pdf(docx_content: Union[bytes, BinaryIO, str]) -> bytes:
+    """
+    Convert DOCX file to PDF using LibreOffice
+    
+    Args:
+        docx_content: DOCX file as bytes, a binary file-like object, or the
+            path of a DOCX already on disk
+        
+    Returns:
+        PDF file as bytes
+        
+    Raises:
+        Exception: If conversion fails
+    """
+    pdf_path = convert_docx_to_pdf_to_file(docx_content)
+    try:
+        with open(pdf_path, 'rb') as pdf_file:
+            return pdf_file.read()
+    finally:
+        os.remove(pdf_path)
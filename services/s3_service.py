@@ -1,18 +1,53 @@
 """S3 utilities for uploading files and generating presigned URLs."""
 
-from typing import Optional
+import threading
+from io import BytesIO
+from typing import BinaryIO, Optional, Union
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+
+
+# Pooled keep-alive connections shared by every S3 call in the process
+_CLIENT_CONFIG = Config(
+    max_pool_connections=32,
+    tcp_keepalive=True,
+    retries={"mode": "standard"},
+)
+
+
+# Objects above the threshold are sent as a parallel multipart upload
+_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * 1024 * 1024,
+    multipart_chunksize=8 * 1024 * 1024,
+    max_concurrency=4,
+    use_threads=True,
+)
+
+
+_S3 = None
+_S3_LOCK = threading.Lock()
 
 
 def get_s3_client():
-    """Return a boto3 S3 client using default AWS credentials in Lambda."""
-    return boto3.client("s3")
+    """Return the process-wide boto3 S3 client using default AWS credentials in Lambda.
+
+    Built once and reused, so service models, signers and connections are not
+    set up again on every call. Construction is serialized with a lock because
+    the default boto3 session is not thread-safe; the finished client is.
+    """
+    global _S3
+    if _S3 is None:
+        with _S3_LOCK:
+            if _S3 is None:
+                _S3 = boto3.client("s3", config=_CLIENT_CONFIG)
+    return _S3
 
 
 def upload_bytes_to_s3(
     bucket: str,
     key: str,
-    data: bytes,
+    data: Union[bytes, BinaryIO],
     content_type: Optional[str] = None,
 ) -> None:
     """Upload raw bytes to S3 as an object.
@@ -20,18 +55,44 @@ def upload_bytes_to_s3(
     Args:
         bucket: Target S3 bucket name.
         key: Object key/path inside the bucket.
-        data: Raw bytes to upload.
+        data: Raw bytes or a binary file-like object to upload.
         content_type: Optional MIME type for the object.
     """
     s3 = get_s3_client()
-    put_kwargs = {
-        "Bucket": bucket,
-        "Key": key,
-        "Body": data,
-    }
-    if content_type:
-        put_kwargs["ContentType"] = content_type
-    s3.put_object(**put_kwargs)
+    fileobj = BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+    extra_args = {"ContentType": content_type} if content_type else None
+    s3.upload_fileobj(
+        fileobj,
+        bucket,
+        key,
+        ExtraArgs=extra_args,
+        Config=_TRANSFER_CONFIG,
+    )
+
+
+def upload_file_to_s3(
+    bucket: str,
+    key: str,
+    path: str,
+    content_type: Optional[str] = None,
+) -> None:
+    """Upload a local file to S3 as an object, streaming it from disk.
+
+    Args:
+        bucket: Target S3 bucket name.
+        key: Object key/path inside the bucket.
+        path: Local path of the file to upload.
+        content_type: Optional MIME type for the object.
+    """
+    s3 = get_s3_client()
+    extra_args = {"ContentType": content_type} if content_type else None
+    s3.upload_file(
+        path,
+        bucket,
+        key,
+        ExtraArgs=extra_args,
+        Config=_TRANSFER_CONFIG,
+    )
 
 
 def generate_presigned_get_url(
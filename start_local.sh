@@ -31,6 +31,17 @@ if ! command -v soffice &> /dev/null; then
     read -p "Press [Enter] to continue anyway..."
 fi
 
+# Start a persistent unoserver if available, so conversions reuse one LibreOffice
+# instead of starting soffice per request. Each run gets its own profile dir.
+if command -v unoserver &> /dev/null; then
+    export UNOSERVER_PORT="${UNOSERVER_PORT:-2003}"
+    echo "📄 Starting unoserver on port $UNOSERVER_PORT..."
+    unoserver --interface 127.0.0.1 --port "$UNOSERVER_PORT" \
+        --user-installation "file:///tmp/unoserver-profile-$$" &
+    UNOSERVER_PID=$!
+    trap 'kill $UNOSERVER_PID 2>/dev/null' EXIT
+fi
+
 # Create virtual environment if it doesn't exist
 if [ ! -d "$VENV_DIR" ]; then
     echo "Creating new virtual environment in '$VENV_DIR'..."
@@ -5,12 +5,18 @@ from typing import Optional
 from werkzeug.exceptions import BadRequest
 
 
-def validate_docx_file(file) -> None:
+# ZIP local file header signature every .docx starts with
+DOCX_MAGIC = b'PK\x03\x04'
+
+
+def validate_docx_file(file, content_length: Optional[int] = None) -> None:
     """
     Validate uploaded DOCX file
     
     Args:
         file: File object from Flask request
+        content_length: Optional Content-Length of the whole request; when it
+            is within the limit the file size does not need to be measured
         
     Raises:
         BadRequest: If file is invalid
@@ -26,12 +32,22 @@ def validate_docx_file(file) -> None:
     if not filename.endswith('.docx'):
         raise BadRequest("File must be a .docx file")
     
-    # Check file size (max 10MB)
+    # A DOCX is a ZIP archive, which starts with a local file header
+    head = file.read(4)
+    file.seek(0)  # Reset file pointer
+    if head != DOCX_MAGIC:
+        raise BadRequest("File is not a valid .docx document")
+    
+    # Check file size (max 10MB). The request body bounds the file size, so
+    # only measure the file when the request itself is larger than the limit.
+    max_size = 10 * 1024 * 1024  # 10MB
+    if content_length is not None and content_length <= max_size:
+        return
+    
     file.seek(0, os.SEEK_END)
     file_size = file.tell()
     file.seek(0)  # Reset file pointer
     
-    max_size = 10 * 1024 * 1024  # 10MB
     if file_size > max_size:
         raise BadRequest(f"File size exceeds maximum allowed size of 10MB")
 